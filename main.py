@@ -7,11 +7,7 @@ from loguru import logger
 import numpy as np
 
 from src.core.video import VideoSource
-from src.core.detector import SafeDetector
-from src.core.tracker import SafetyTracker
-from src.logic.compliance import PPEComplianceEngine
-from src.logic.behavior import BehaviorMonitor
-from src.logic.zones import ZoneMonitor
+from src.core.pipeline import SafetyPipeline, alert_messages
 from src.data.alert_manager import AlertManager
 
 def load_config(path="configs/factory_config.yaml"):
@@ -24,59 +20,33 @@ def main():
     
     # Initialize Core
     source = config['camera']['source']
-    fps = config['camera'].get('fps', 30)
-    person_id = config['camera'].get('person_class_id', 11)
-    
     video = VideoSource(source=source)
     
-    # Check for custom model
-    custom_model_path = "runs/train/ppe_model/weights/best.pt"
-    model_path = custom_model_path if os.path.exists(custom_model_path) else "yolov8n.pt"
-    logger.info(f"Loading model from: {model_path}")
-    
-    detector = SafeDetector(model_path=model_path) # Defaults to yolov8n
+    pipeline = SafetyPipeline(config)
+    detector = pipeline.detector
     logger.info(f"Model Classes: {detector.model.names}")
-    tracker = SafetyTracker()
-    
-    # Initialize Logic
-    ppe_config = config.get('ppe', {}).get('mandatory_classes', None)
-    ppe_engine = PPEComplianceEngine(mandatory_ppe=ppe_config, person_class_id=person_id)
-    behavior_monitor = BehaviorMonitor(fps=fps, person_class_id=person_id)
-    zone_monitor = ZoneMonitor(zones_config=config.get('zones'), person_class_id=person_id)
     alert_manager = AlertManager()
     
     # Annotators
     box_annotator = sv.BoxAnnotator()
     label_annotator = sv.LabelAnnotator()
-    zone_annotators = [sv.PolygonZoneAnnotator(zone=z['zone'], color=sv.Color.RED) for z in zone_monitor.zones]
+    zone_annotators = [sv.PolygonZoneAnnotator(zone=z['zone'], color=sv.Color.RED) for z in pipeline.zone_monitor.zones]
 
     try:
         while True:
             frame = video.read()
             if frame is None:
+                if video.finished.is_set():
+                    logger.info("Video source finished")
+                    break
                 continue
 
-            # 1. Detection
-            detections = detector.detect(frame)
-            
-            # 2. Tracking
-            detections = tracker.update(detections)
-            
-            # 3. Logic & Alerts
-            # Zone Logic
-            zone_alerts = zone_monitor.check_overcrowding(detections)
-            alert_manager.process_alerts(zone_alerts)
-            
-            # Behavior Logic
-            behavior_alerts = behavior_monitor.update(detections)
-            for tid, alerts in behavior_alerts.items():
-                alert_manager.process_alerts([f"Person {tid}: {a}" for a in alerts])
+            # 1-3. Detection, Tracking, Logic
+            result = pipeline.process(frame)
+            detections = result['detections']
             
-            # PPE Logic (Placeholder logic as described in engine)
-            ppe_results = ppe_engine.check_compliance(detections)
-            for res in ppe_results:
-                if res['status'] == 'UNSAFE':
-                    alert_manager.process_alerts([f"Person {res['tracker_id']} Missing PPE: {res['missing']}"])
+            # Alerts
+            alert_manager.process_alerts(alert_messages(result))
 
             # 4. Visualization
             labels = []
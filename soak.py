@@ -0,0 +1,280 @@
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+import tracemalloc
+import cv2
+import numpy as np
+import supervision as sv
+import yaml
+from loguru import logger
+
+from src.core.pipeline import SafetyPipeline
+
+# Long-run soak harness: drives SafetyPipeline headless over days of simulated
+# footage (accelerated time) and fails if memory or p99 latency drifts.
+
+
+class SyntheticScene:
+    def __init__(self, width=1280, height=720, mean_people=8, mean_lifetime_s=20.0, fps=30,
+                 ppe_rate=0.7, person_class_id=11, ppe_class_ids=(3, 13), seed=0):
+        """
+        Endless stream of people walking through the frame with constant turnover,
+        so the tracker keeps minting new IDs like a real shop floor.
+        mean_people: average number of people on screen.
+        mean_lifetime_s: average seconds a person stays before leaving.
+        ppe_rate: probability each PPE item is worn.
+        """
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.person_class_id = person_class_id
+        self.ppe_class_ids = ppe_class_ids
+        self.ppe_rate = ppe_rate
+        self.rng = np.random.default_rng(seed)
+        self.leave_p = 1.0 / (mean_lifetime_s * fps)
+        self.spawn_p = mean_people * self.leave_p
+        self.people = []
+        for _ in range(mean_people):
+            self.people.append(self._spawn())
+
+    def _spawn(self):
+        w = self.rng.uniform(40, 90)
+        h = w * self.rng.uniform(2.0, 2.6)
+        return {
+            'pos': np.array([self.rng.uniform(0, self.width - w), self.rng.uniform(0, self.height - h)]),
+            'size': np.array([w, h]),
+            'vel': self.rng.normal(0, 1.5, size=2),
+            'ppe': [c for c in self.ppe_class_ids if self.rng.random() < self.ppe_rate],
+        }
+
+    def step(self):
+        """
+        Advance one frame. Returns: sv.Detections of people and their PPE.
+        """
+        self.people = [p for p in self.people if self.rng.random() >= self.leave_p]
+        if self.rng.random() < self.spawn_p:
+            self.people.append(self._spawn())
+
+        boxes, class_ids = [], []
+        for p in self.people:
+            p['pos'] = np.clip(p['pos'] + p['vel'], 0, [self.width - p['size'][0], self.height - p['size'][1]])
+            x1, y1 = p['pos']
+            w, h = p['size']
+            boxes.append([x1, y1, x1 + w, y1 + h])
+            class_ids.append(self.person_class_id)
+            for i, c in enumerate(p['ppe']):
+                # Hardhat on the head, vest on the torso
+                top = y1 + (0.0 if i == 0 else 0.3) * h
+                boxes.append([x1 + 0.2 * w, top, x1 + 0.8 * w, top + 0.25 * h])
+                class_ids.append(c)
+
+        if not boxes:
+            return sv.Detections.empty()
+        return sv.Detections(
+            xyxy=np.array(boxes, dtype=np.float32),
+            class_id=np.array(class_ids),
+            confidence=self.rng.uniform(0.5, 0.95, size=len(boxes)).astype(np.float32)
+        )
+
+
+class SyntheticDetector:
+    def __init__(self, scene):
+        """
+        Stands in for SafeDetector: ignores the frame and returns the scene's next detections.
+        """
+        self.scene = scene
+
+    def detect(self, frame):
+        return self.scene.step()
+
+
+def generate_video(path, seconds, scene, fps=30):
+    """
+    Render a scene to a video file (people as filled boxes) for runs
+    through the real detector.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (scene.width, scene.height))
+    for _ in range(int(seconds * fps)):
+        frame = np.full((scene.height, scene.width, 3), 60, dtype=np.uint8)
+        detections = scene.step()
+        for box, class_id in zip(detections.xyxy.astype(int), detections.class_id):
+            color = (200, 160, 120) if class_id == scene.person_class_id else (0, 200, 255)
+            cv2.rectangle(frame, tuple(box[:2]), tuple(box[2:]), color, -1)
+        writer.write(frame)
+    writer.release()
+
+
+def looped_frames(path):
+    """
+    Yield frames from a video file forever, rewinding at the end.
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Cannot open video {path}")
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ret, frame = cap.read()
+                if not ret:
+                    raise IOError(f"Video {path} has no frames")
+            yield frame
+    finally:
+        cap.release()
+
+
+def read_rss_bytes():
+    """
+    Current resident set size from /proc. Returns None where unavailable.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def run_soak(pipeline, frames, fps=30, duration_s=24 * 3600, sample_every_s=600, trace_memory=True):
+    """
+    Drive the pipeline for `duration_s` seconds of simulated footage.
+    frames: iterator of frames (a dummy frame is fine with SyntheticDetector).
+    Returns: list of samples, one per `sample_every_s` simulated seconds, each
+             with memory readings, history size and per-stage p99 latency (ms)
+             over that window.
+    """
+    if trace_memory:
+        tracemalloc.start()
+
+    total_frames = int(duration_s * fps)
+    sample_every = max(int(sample_every_s * fps), 1)
+    window = {}
+    samples = []
+    wall_start = time.time()
+
+    try:
+        for i in range(total_frames):
+            result = pipeline.process(next(frames), timestamp=i / fps)
+            for stage, seconds in result['timings'].items():
+                window.setdefault(stage, []).append(seconds)
+            window.setdefault('total', []).append(sum(result['timings'].values()))
+
+            if (i + 1) % sample_every == 0:
+                rss = read_rss_bytes()
+                sample = {
+                    "sim_hours": round((i + 1) / fps / 3600, 3),
+                    "wall_s": round(time.time() - wall_start, 1),
+                    "traced_mb": tracemalloc.get_traced_memory()[0] / 1e6 if trace_memory else None,
+                    "rss_mb": rss / 1e6 if rss is not None else None,
+                    "history_tracks": len(pipeline.behavior_monitor.history),
+                    "p99_ms": {stage: float(np.percentile(v, 99)) * 1000 for stage, v in window.items()},
+                }
+                samples.append(sample)
+                logger.info(f"Soak {sample['sim_hours']}h: traced={_mb(sample['traced_mb'])} "
+                            f"rss={_mb(sample['rss_mb'])} history={sample['history_tracks']} "
+                            f"p99={sample['p99_ms']['total']:.2f} ms")
+                window = {}
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    return samples
+
+
+def _mb(value):
+    return "n/a" if value is None else f"{value:.1f} MB"
+
+
+def check_drift(samples, max_traced_growth_mb=20.0, max_rss_growth_mb=100.0, max_p99_ratio=2.0,
+                min_p99_ms=1.0, warmup_samples=1):
+    """
+    Compare the end of the run with the first sample after warmup.
+    min_p99_ms: latency floor per stage, so sub-millisecond stages do not
+                fail the run on timer noise.
+    Returns: list of failure messages, empty if the run is within limits.
+    """
+    if len(samples) < warmup_samples + 2:
+        return [f"Need at least {warmup_samples + 2} samples to measure drift, got {len(samples)}"]
+
+    base = samples[warmup_samples]
+    # Average the last few samples so one noisy window does not fail the run
+    tail = samples[warmup_samples + 1:][-3:]
+    failures = []
+
+    for key, limit in (('traced_mb', max_traced_growth_mb), ('rss_mb', max_rss_growth_mb)):
+        if base[key] is None:
+            continue
+        growth = np.mean([s[key] for s in tail]) - base[key]
+        if growth > limit:
+            failures.append(f"{key} grew {growth:.1f} MB (limit {limit} MB)")
+
+    for stage, base_p99 in base['p99_ms'].items():
+        end_p99 = np.mean([s['p99_ms'].get(stage, 0.0) for s in tail])
+        if end_p99 / max(base_p99, min_p99_ms) > max_p99_ratio:
+            failures.append(f"{stage} p99 latency drifted {base_p99:.2f} -> {end_p99:.2f} ms "
+                            f"(limit x{max_p99_ratio})")
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-run soak test for the safety pipeline")
+    parser.add_argument("--config", default="configs/factory_config.yaml")
+    parser.add_argument("--hours", type=float, default=24.0, help="Simulated footage to process")
+    parser.add_argument("--fps", type=int, default=10)
+    parser.add_argument("--sample-minutes", type=float, default=30.0)
+    parser.add_argument("--video", default=None,
+                        help="Run the real detector over this clip (looped). "
+                             "Use --generate-video to create one. Default: synthetic detections")
+    parser.add_argument("--generate-video", default=None, help="Write a synthetic clip here and exit")
+    parser.add_argument("--max-traced-growth-mb", type=float, default=20.0)
+    parser.add_argument("--max-rss-growth-mb", type=float, default=100.0)
+    parser.add_argument("--max-p99-ratio", type=float, default=2.0)
+    parser.add_argument("--min-p99-ms", type=float, default=1.0,
+                        help="Stages faster than this are not checked for drift")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="RSS only; tracemalloc slows the run")
+    parser.add_argument("--report", default=None, help="Write samples and verdict as JSON")
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+    config.setdefault('camera', {})['fps'] = args.fps
+    person_id = config['camera'].get('person_class_id', 11)
+    ppe_ids = tuple(config.get('ppe', {}).get('mandatory_classes') or (3, 13))
+    scene = SyntheticScene(fps=args.fps, person_class_id=person_id, ppe_class_ids=ppe_ids)
+
+    if args.generate_video:
+        generate_video(args.generate_video, seconds=300, scene=scene, fps=args.fps)
+        logger.info(f"Wrote {args.generate_video}")
+        return
+
+    if args.video:
+        pipeline = SafetyPipeline(config)
+        frames = looped_frames(args.video)
+    else:
+        pipeline = SafetyPipeline(config, detector=SyntheticDetector(scene))
+        frames = itertools.repeat(np.zeros((1, 1, 3), dtype=np.uint8))
+
+    samples = run_soak(pipeline, frames, fps=args.fps, duration_s=args.hours * 3600,
+                       sample_every_s=args.sample_minutes * 60, trace_memory=not args.no_tracemalloc)
+    failures = check_drift(samples, max_traced_growth_mb=args.max_traced_growth_mb,
+                           max_rss_growth_mb=args.max_rss_growth_mb, max_p99_ratio=args.max_p99_ratio,
+                           min_p99_ms=args.min_p99_ms)
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({"samples": samples, "failures": failures}, f, indent=2)
+
+    if failures:
+        for msg in failures:
+            logger.error(f"SOAK FAILED: {msg}")
+        sys.exit(1)
+    logger.info("SOAK PASSED")
+
+
+if __name__ == "__main__":
+    main()
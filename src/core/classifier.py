@@ -0,0 +1,35 @@
+import cv2
+import numpy as np
+
+
+class PPEClassifier:
+    def __init__(self, model_path, labels, imgsz=96, apply_sigmoid=True):
+        """
+        Small multi-label PPE classifier run on person crops (second stage).
+        model_path: ONNX model taking (N, 3, imgsz, imgsz) RGB in [0, 1] and
+                    returning (N, len(labels)) scores, one per PPE item.
+        labels: list of int, detector class IDs matching the output columns
+                (e.g. [3, 13] for Hardhat, Safety Vest).
+        apply_sigmoid: set False if the model already outputs probabilities.
+        """
+        self.net = cv2.dnn.readNet(model_path)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        self.labels = list(labels)
+        self.imgsz = imgsz
+        self.apply_sigmoid = apply_sigmoid
+
+    def predict(self, crops):
+        """
+        Classify a batch of BGR crops in one forward pass.
+        Returns: np.ndarray (N, len(labels)) of probabilities.
+        """
+        if not crops:
+            return np.zeros((0, len(self.labels)), dtype=np.float32)
+
+        blob = cv2.dnn.blobFromImages(crops, scalefactor=1 / 255.0, size=(self.imgsz, self.imgsz), swapRB=True)
+        self.net.setInput(blob)
+        scores = self.net.forward().reshape(len(crops), -1)
+        if self.apply_sigmoid:
+            scores = 1 / (1 + np.exp(-scores))
+        return scores
@@ -4,13 +4,16 @@ import cv2
 import numpy as np
 
 class SafeDetector:
-    def __init__(self, model_path="yolov8n.pt", device="cpu", conf_threshold=0.4):
+    def __init__(self, model_path="yolov8n.pt", device="cpu", conf_threshold=0.4, imgsz=640):
         """
         Wrapper for YOLOv8 model tailored for Safety Monitoring.
+        model_path: .pt weights or an exported model (ONNX / OpenVINO dir).
+        imgsz: inference input size; must match the export size for exported models.
         """
-        self.model = YOLO(model_path)
+        self.model = YOLO(model_path, task="detect")
         self.device = device
         self.conf_threshold = conf_threshold
+        self.imgsz = imgsz
         
         # Define classes of interest based on COCO or custom model
         # For standard YOLOv8 COCO: 0 is Person.
@@ -30,7 +33,7 @@ class SafeDetector:
         Run inference on a frame.
         Returns: sv.Detections
         """
-        results = self.model(frame, device=self.device, verbose=False, conf=self.conf_threshold)[0]
+        results = self.model(frame, device=self.device, verbose=False, conf=self.conf_threshold, imgsz=self.imgsz)[0]
         
         # Convert to supervision Detections
         detections = sv.Detections.from_ultralytics(results)
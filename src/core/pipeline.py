@@ -0,0 +1,164 @@
+import os
+import time
+import yaml
+from loguru import logger
+
+from .detector import SafeDetector
+from .tracker import SafetyTracker
+from .classifier import PPEClassifier
+from ..logic.compliance import PPEComplianceEngine, TwoStageComplianceEngine
+from ..logic.behavior import BehaviorMonitor
+from ..logic.zones import ZoneMonitor
+
+CUSTOM_MODEL_PATH = "runs/train/ppe_model/weights/best.pt"
+SELECTED_MODEL_FILE = "runs/sweep/selected_model.yaml"  # written by `train.py --sweep`
+
+
+def resolve_model(config=None):
+    """
+    Pick the weights and input size to run with, in order of preference:
+    explicit `model` section of config, the model picked by the train.py sweep,
+    the custom trained model, stock yolov8n.
+    Returns: (model_path, imgsz)
+    """
+    model = (config or {}).get('model', {})
+    if model.get('path'):
+        return model['path'], model.get('imgsz', 640)
+    if os.path.exists(SELECTED_MODEL_FILE):
+        with open(SELECTED_MODEL_FILE, 'r') as f:
+            selected = yaml.safe_load(f)
+        return selected['path'], selected.get('imgsz', 640)
+    return (CUSTOM_MODEL_PATH if os.path.exists(CUSTOM_MODEL_PATH) else "yolov8n.pt"), 640
+
+
+class SafetyPipeline:
+    def __init__(self, config, detector=None):
+        """
+        Headless Detection -> Tracking -> Logic pipeline for one camera.
+        config: dict in the factory_config.yaml layout.
+        detector: optional object with detect(frame) -> sv.Detections.
+                  Built from config if None.
+        """
+        camera = config.get('camera', {})
+        fps = camera.get('fps', 30)
+        person_id = camera.get('person_class_id', 11)
+
+        if detector is None:
+            model_path, imgsz = resolve_model(config)
+            logger.info(f"Loading model from: {model_path} (imgsz={imgsz})")
+            detector = SafeDetector(model_path=model_path, imgsz=imgsz)
+        self.detector = detector
+        self.tracker = SafetyTracker()
+
+        ppe = config.get('ppe', {})
+        ppe_config = ppe.get('mandatory_classes', None)
+        classifier_config = ppe.get('classifier')
+        if classifier_config:
+            # Two-stage: detector finds people, a crop classifier decides their PPE
+            classifier = PPEClassifier(
+                model_path=classifier_config['model'],
+                labels=classifier_config.get('labels', ppe_config or [3, 13]),
+                imgsz=classifier_config.get('imgsz', 96),
+                apply_sigmoid=classifier_config.get('apply_sigmoid', True)
+            )
+            self.ppe_engine = TwoStageComplianceEngine(
+                classifier,
+                mandatory_ppe=ppe_config,
+                person_class_id=person_id,
+                threshold=classifier_config.get('threshold', 0.5),
+                iou_threshold=classifier_config.get('iou_threshold', 0.6),
+                appearance_threshold=classifier_config.get('appearance_threshold', 0.3),
+                max_age=classifier_config.get('max_age', 150)
+            )
+        else:
+            self.ppe_engine = PPEComplianceEngine(mandatory_ppe=ppe_config, person_class_id=person_id)
+        self.behavior_monitor = BehaviorMonitor(fps=fps, person_class_id=person_id)
+        self.zone_monitor = ZoneMonitor(zones_config=config.get('zones'), person_class_id=person_id)
+
+    def process(self, frame, timestamp=None):
+        """
+        Run all stages on a frame.
+        timestamp: float seconds of this frame, for replayed or simulated
+                   footage. Defaults to wall clock.
+        Returns: dict with detections, zone_alerts, behavior_alerts, ppe_results,
+                 and timings {stage: seconds} for this frame.
+        """
+        timings = {}
+        start = time.perf_counter()
+
+        # 1. Detection
+        detections = self.detector.detect(frame)
+        start = _lap(timings, 'detect', start)
+
+        # 2. Tracking
+        detections = self.tracker.update(detections)
+        start = _lap(timings, 'track', start)
+
+        # 3. Logic
+        zone_alerts = self.zone_monitor.check_overcrowding(detections)
+        start = _lap(timings, 'zones', start)
+        behavior_alerts = self.behavior_monitor.update(detections, timestamp=timestamp)
+        start = _lap(timings, 'behavior', start)
+        ppe_results = self.ppe_engine.check_compliance(detections, frame=frame)
+        _lap(timings, 'ppe', start)
+
+        return {
+            "detections": detections,
+            "zone_alerts": zone_alerts,
+            "behavior_alerts": behavior_alerts,
+            "ppe_results": ppe_results,
+            "timings": timings,
+        }
+
+
+def _lap(timings, stage, start):
+    now = time.perf_counter()
+    timings[stage] = now - start
+    return now
+
+
+def alert_messages(result):
+    """
+    Flatten a pipeline result into the alert strings fed to the AlertManager.
+    """
+    messages = list(result['zone_alerts'])
+    for tid, alerts in result['behavior_alerts'].items():
+        messages.extend(f"Person {tid}: {a}" for a in alerts)
+    for res in result['ppe_results']:
+        if res['status'] == 'UNSAFE':
+            messages.append(f"Person {res['tracker_id']} Missing PPE: {res['missing']}")
+    return messages
+
+
+def summarize(result, camera_id=None):
+    """
+    Compact, JSON-serialisable view of a pipeline result.
+    Drops frames and masks; keeps tracks, compliance states, zone events
+    and the flattened alert strings.
+    """
+    detections = result['detections']
+    tracks = []
+    for i in range(len(detections)):
+        tracker_id = detections.tracker_id[i] if detections.tracker_id is not None else None
+        tracks.append({
+            "tracker_id": int(tracker_id) if tracker_id is not None else -1,
+            "class_id": int(detections.class_id[i]),
+            "confidence": round(float(detections.confidence[i]), 3) if detections.confidence is not None else None,
+            "box": [round(float(v), 1) for v in detections.xyxy[i]],
+        })
+
+    compliance = [{
+        "tracker_id": int(res['tracker_id']),
+        "status": res['status'],
+        "missing": list(res['missing']),
+    } for res in result['ppe_results']]
+
+    return {
+        "camera_id": camera_id,
+        "timestamp": time.time(),
+        "tracks": tracks,
+        "compliance": compliance,
+        "zone_events": list(result['zone_alerts']),
+        "behavior": {str(int(tid)): list(a) for tid, a in result['behavior_alerts'].items()},
+        "alerts": alert_messages(result),
+    }
@@ -5,14 +5,20 @@ import queue
 from loguru import logger
 
 class VideoSource:
-    def __init__(self, source, buffer_size=2):
+    def __init__(self, source, buffer_size=2, loop=False):
         """
         Robust Video Source that runs in a separate thread to keep buffer fresh.
         args:
             source: int (webcam) or str (RTSP url / file path)
             buffer_size: Queue size for frames
+            loop: rewind file sources at end of stream instead of retrying.
+                  Lets recorded clips stand in for RTSP cameras.
         """
         self.source = source
+        self.loop = loop
+        # Local files end instead of dropping out; they are not reconnected
+        self.is_file = isinstance(source, str) and "://" not in source
+        self.finished = threading.Event()
         self.cap = cv2.VideoCapture(self.source)
         self.q = queue.Queue(maxsize=buffer_size)
         self.stop_event = threading.Event()
@@ -31,14 +37,27 @@ class VideoSource:
     def _update(self):
         while not self.stop_event.is_set():
             if not self.cap.isOpened():
+                if self.is_file:
+                    logger.error(f"Video file {self.source} could not be opened")
+                    self.finished.set()
+                    break
                 logger.warning(f"Video source {self.source} reconnecting...")
                 self._reconnect()
                 time.sleep(1)
                 continue
 
             ret, frame = self.cap.read()
+            if not ret and self.loop:
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ret, frame = self.cap.read()
+
+            if not ret and self.is_file:
+                logger.info(f"Video file {self.source} ended")
+                self.finished.set()
+                break
+
             if not ret:
-                # If it's a file, maybe loop or stop? For industry cam, it's reconnect.
+                # For industry cam, it's reconnect.
                 # If persistent failure, wait a bit
                 logger.warning("Failed to read frame")
                 time.sleep(0.1)
@@ -61,7 +80,7 @@ class VideoSource:
     def read(self):
         """
         Get latest frame from queue. Non-blocking/blocking configurable.
-        Returns: frame or None
+        Returns: frame or None (check `finished` to tell a file's end from a stall)
         """
         try:
             return self.q.get(timeout=1.0) # Wait up to 1s for a frame
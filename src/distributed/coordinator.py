@@ -0,0 +1,418 @@
+import argparse
+import copy
+import hmac
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import yaml
+from loguru import logger
+
+from .protocol import MessageChannel
+
+# Per-camera keys that replace the base config section wholesale.
+# Everything else in a camera entry (source, loop, fps, ...) goes under 'camera'.
+SECTION_OVERRIDES = ('zones', 'ppe', 'model')
+
+
+def build_camera_configs(cluster_config, base_config):
+    """
+    Expand the cluster `cameras` list into one full factory-style config per camera.
+    Returns: dict {camera_id: config}
+    """
+    configs = {}
+    for entry in cluster_config.get('cameras', []):
+        camera_id = str(entry['id'])
+        config = copy.deepcopy(base_config)
+        camera = dict(config.get('camera', {}))
+        for key, value in entry.items():
+            if key == 'id':
+                continue
+            if key in SECTION_OVERRIDES:
+                config[key] = copy.deepcopy(value)
+            else:
+                camera[key] = value
+        config['camera'] = camera
+        configs[camera_id] = config
+    return configs
+
+
+class _WorkerHandle:
+    def __init__(self, worker_id, channel, capacity):
+        self.worker_id = worker_id
+        self.channel = channel
+        self.capacity = capacity
+        self.cameras = set()
+        self.last_seen = time.time()
+
+    @property
+    def load(self):
+        return len(self.cameras)
+
+
+class Coordinator:
+    def __init__(self, cameras, host="127.0.0.1", port=7070, token=None, heartbeat_timeout=10.0,
+                 alert_cooldown=30.0, retry_backoff=5.0, result_timeout=30.0, on_alert=None, on_result=None):
+        """
+        Assigns camera configs to CameraWorkers over TCP and aggregates their results.
+        cameras: dict {camera_id: config}, see build_camera_configs.
+        host: interface to listen on. Loopback by default; anything else requires a token,
+              since workers receive full camera configs (RTSP URLs with credentials).
+        token: shared secret workers must send in their hello.
+        heartbeat_timeout: seconds of silence before a worker is declared dead
+                           and its cameras are moved to the remaining workers.
+        alert_cooldown: seconds before the same alert from the same camera is raised again.
+        retry_backoff: seconds a failed camera waits before it is reassigned,
+                       preferably to a different worker.
+        result_timeout: seconds an assigned camera may go without results (e.g. an
+                        RTSP feed that stays down) before it is treated as failed.
+        on_alert: callable(camera_id, message). Defaults to logging a warning.
+        on_result: optional callable(summary), called for every worker result.
+        """
+        self.cameras = cameras
+        self.host = host
+        self.port = port
+        self.token = token
+        self.heartbeat_timeout = heartbeat_timeout
+        self.alert_cooldown = alert_cooldown
+        self.retry_backoff = retry_backoff
+        self.result_timeout = result_timeout
+        self.on_alert = on_alert or (lambda camera_id, message: logger.warning(f"[{camera_id}] {message}"))
+        self.on_result = on_result
+
+        self.workers = {}       # worker_id -> _WorkerHandle
+        self.assignments = {}   # camera_id -> worker_id
+        self.latest = {}        # camera_id -> last summary
+        self.last_alert = {}    # (camera_id, message) -> timestamp
+        self.retries = {}       # camera_id -> (retry_at, worker_id it failed on)
+        self.last_active = {}   # camera_id -> time of assignment or last result
+        self.lock = threading.RLock()
+        self.stop_event = threading.Event()
+        self.server = None
+
+    def start(self):
+        """
+        Bind and start serving in background threads. Returns the bound port.
+        """
+        if not self.token and self.host not in ('127.0.0.1', 'localhost', '::1'):
+            raise ValueError(f"Refusing to listen on {self.host} without a token")
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind((self.host, self.port))
+        self.server.listen()
+        self.port = self.server.getsockname()[1]
+
+        threading.Thread(target=self._accept, daemon=True).start()
+        threading.Thread(target=self._monitor, daemon=True).start()
+        logger.info(f"Coordinator listening on {self.host}:{self.port} for {len(self.cameras)} cameras")
+        return self.port
+
+    def stop(self):
+        self.stop_event.set()
+        with self.lock:
+            for handle in list(self.workers.values()):
+                self._send(handle, {"type": "shutdown"})
+                handle.channel.close()
+        if self.server is not None:
+            self.server.close()
+
+    def status(self):
+        """
+        Snapshot of worker loads and camera assignments.
+        """
+        with self.lock:
+            return {
+                "workers": {wid: sorted(h.cameras) for wid, h in self.workers.items()},
+                "unassigned": sorted(cid for cid in self.cameras if cid not in self.assignments),
+                "retrying": sorted(self.retries),
+            }
+
+    def _accept(self):
+        while not self.stop_event.is_set():
+            try:
+                conn, addr = self.server.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._handle_worker, args=(conn, addr), daemon=True).start()
+
+    def _handle_worker(self, conn, addr):
+        channel = MessageChannel(conn)
+        handle = None
+        try:
+            hello = channel.recv()
+            if hello is None or hello.get('type') != 'hello':
+                logger.warning(f"Rejected connection from {addr}: expected hello")
+                return
+            # Checked before registering, so an impostor cannot evict a worker by reusing its id
+            if self.token and not hmac.compare_digest(str(hello.get('token', '')), self.token):
+                logger.warning(f"Rejected worker {hello.get('worker_id')} from {addr}: bad token")
+                return
+
+            handle = _WorkerHandle(hello['worker_id'], channel, int(hello.get('capacity', 1)))
+            with self.lock:
+                stale = self.workers.get(handle.worker_id)
+                if stale is not None:
+                    self._drop_worker(stale)
+                self.workers[handle.worker_id] = handle
+                logger.info(f"Worker {handle.worker_id} joined from {addr[0]} (capacity {handle.capacity})")
+                self._rebalance()
+
+            while not self.stop_event.is_set():
+                msg = channel.recv()
+                if msg is None:
+                    break
+                handle.last_seen = time.time()
+
+                if msg['type'] == 'result':
+                    self._on_result(msg['summary'])
+                elif msg['type'] == 'heartbeat':
+                    self._raise(self._reconcile(handle, set(msg.get('cameras', []))))
+                elif msg['type'] == 'camera_failed':
+                    with self.lock:
+                        alert = self._release(handle, msg['camera_id'],
+                                              f"after failure on {handle.worker_id} ({msg.get('error')})")
+                    self._raise([alert])
+        except (OSError, ValueError) as e:
+            logger.warning(f"Worker connection {addr} error: {e}")
+        finally:
+            if handle is not None:
+                with self.lock:
+                    self._drop_worker(handle)
+                    self._rebalance()
+            channel.close()
+
+    def _monitor(self):
+        while not self.stop_event.wait(max(self.heartbeat_timeout / 4, 0.1)):
+            now = time.time()
+            alerts = []
+            with self.lock:
+                for handle in list(self.workers.values()):
+                    if now - handle.last_seen > self.heartbeat_timeout:
+                        logger.warning(f"Worker {handle.worker_id} missed heartbeats, dropping")
+                        # Closing wakes its handler thread, which drops and rebalances
+                        handle.channel.close()
+
+                # Cameras whose worker is alive but which stopped producing results
+                for camera_id, worker_id in list(self.assignments.items()):
+                    handle = self.workers.get(worker_id)
+                    if handle is not None and now - self.last_active.get(camera_id, now) > self.result_timeout:
+                        alerts.append(self._release(
+                            handle, camera_id,
+                            f"after no results from {worker_id} for {self.result_timeout:.0f}s", revoke=True))
+
+                # Re-queue failed cameras whose backoff has passed
+                if any(retry_at <= now for retry_at, _ in self.retries.values()):
+                    self._rebalance()
+
+                # Cameras nobody is watching and that are not waiting for a retry
+                for camera_id in self.cameras:
+                    if camera_id not in self.assignments and camera_id not in self.retries:
+                        key = (camera_id, "unassigned")
+                        if now - self.last_alert.get(key, 0) >= self.alert_cooldown:
+                            self.last_alert[key] = now
+                            alerts.append((camera_id, "Camera unmonitored: no worker with free capacity"))
+
+                # Forget cooled-down alerts so the table tracks only live incidents
+                expired = [k for k, t in self.last_alert.items() if now - t >= self.alert_cooldown]
+                for k in expired:
+                    del self.last_alert[k]
+
+            self._raise(alerts)
+
+    def _reconcile(self, handle, reported):
+        """
+        Compare a worker's heartbeat camera list with what it was assigned.
+        Returns: list of (camera_id, alert) for assigned cameras it is not running.
+        """
+        alerts = []
+        now = time.time()
+        # Assignments younger than this may not have reached the worker yet
+        grace = max(self.heartbeat_timeout / 4, 0.1)
+        with self.lock:
+            if self.workers.get(handle.worker_id) is not handle:
+                return alerts
+            for camera_id in sorted(handle.cameras - reported):
+                if now - self.last_active.get(camera_id, now) > grace:
+                    alerts.append(self._release(handle, camera_id, f"after {handle.worker_id} stopped running it"))
+            for camera_id in sorted(reported - handle.cameras):
+                # Left over from an earlier assignment; make sure it is stopped
+                self._send(handle, {"type": "revoke", "camera_id": camera_id})
+        return alerts
+
+    def _drop_worker(self, handle):
+        if self.workers.get(handle.worker_id) is not handle:
+            return
+        del self.workers[handle.worker_id]
+        for camera_id in handle.cameras:
+            self.assignments.pop(camera_id, None)
+            self.last_active.pop(camera_id, None)
+        if handle.cameras:
+            logger.warning(f"Worker {handle.worker_id} left, releasing cameras {sorted(handle.cameras)}")
+        handle.cameras.clear()
+        handle.channel.close()
+
+    def _rebalance(self):
+        """
+        Give unassigned cameras to the least loaded workers, then even out
+        loads so no worker has more than one camera above another.
+        Caller must hold self.lock.
+        """
+        if not self.workers:
+            return
+
+        now = time.time()
+        for camera_id in self.cameras:
+            if camera_id in self.assignments:
+                continue
+            retry_at, failed_on = self.retries.get(camera_id, (0, None))
+            if retry_at > now:
+                continue
+            target = self._least_loaded(avoid=failed_on)
+            if target is None:
+                logger.warning(f"No worker capacity left for camera {camera_id}")
+                break
+            self._assign(camera_id, target)
+
+        while True:
+            busiest = max(self.workers.values(), key=lambda h: h.load)
+            target = self._least_loaded()
+            if target is None or busiest.load - target.load <= 1:
+                break
+            camera_id = sorted(busiest.cameras)[-1]
+            busiest.cameras.discard(camera_id)
+            self._send(busiest, {"type": "revoke", "camera_id": camera_id})
+            self._assign(camera_id, target)
+
+    def _least_loaded(self, avoid=None):
+        candidates = [h for h in self.workers.values() if h.load < h.capacity]
+        # Prefer another worker, but fall back to `avoid` if it is the only one with room
+        if any(h.worker_id != avoid for h in candidates):
+            candidates = [h for h in candidates if h.worker_id != avoid]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda h: (h.load / h.capacity, h.worker_id))
+
+    def _assign(self, camera_id, handle):
+        handle.cameras.add(camera_id)
+        self.assignments[camera_id] = handle.worker_id
+        self.retries.pop(camera_id, None)
+        self.last_active[camera_id] = time.time()
+        self._send(handle, {"type": "assign", "camera_id": camera_id, "config": self.cameras[camera_id]})
+        logger.info(f"Assigned camera {camera_id} -> {handle.worker_id}")
+
+    def _release(self, handle, camera_id, reason, revoke=False):
+        """
+        Take a camera off a worker and queue it for reassignment after the backoff.
+        Caller must hold self.lock.
+        Returns: (camera_id, alert message)
+        """
+        logger.error(f"Camera {camera_id} unmonitored {reason}")
+        handle.cameras.discard(camera_id)
+        self.assignments.pop(camera_id, None)
+        self.last_active.pop(camera_id, None)
+        self.retries[camera_id] = (time.time() + self.retry_backoff, handle.worker_id)
+        if revoke:
+            self._send(handle, {"type": "revoke", "camera_id": camera_id})
+        return camera_id, f"Camera unmonitored {reason}, retrying in {self.retry_backoff:.0f}s"
+
+    def _raise(self, alerts):
+        # Called without self.lock so on_alert may block or call back in
+        for camera_id, message in alerts:
+            self.on_alert(camera_id, message)
+
+    def _send(self, handle, msg):
+        try:
+            handle.channel.send(msg)
+        except OSError as e:
+            logger.warning(f"Send to {handle.worker_id} failed: {e}")
+            handle.channel.close()
+
+    def _on_result(self, summary):
+        camera_id = summary['camera_id']
+        now = time.time()
+        with self.lock:
+            self.latest[camera_id] = summary
+            if camera_id in self.assignments:
+                self.last_active[camera_id] = now
+            raised = []
+            for message in summary.get('alerts', []):
+                key = (camera_id, message)
+                if now - self.last_alert.get(key, 0) >= self.alert_cooldown:
+                    self.last_alert[key] = now
+                    raised.append(message)
+
+        for message in raised:
+            self.on_alert(camera_id, message)
+        if self.on_result is not None:
+            self.on_result(summary)
+
+
+def spawn_local_workers(count, port, capacity=1, token=None):
+    """
+    Launch `count` worker processes on this machine pointed at 127.0.0.1:port.
+    The token is passed through the environment to keep it out of `ps`.
+    Returns: list of subprocess.Popen
+    """
+    env = dict(os.environ)
+    if token:
+        env['SAFETY_CLUSTER_TOKEN'] = token
+    procs = []
+    for i in range(count):
+        procs.append(subprocess.Popen([
+            sys.executable, "-m", "src.distributed.worker",
+            "--host", "127.0.0.1",
+            "--port", str(port),
+            "--worker-id", f"local-{i}",
+            "--capacity", str(capacity),
+        ], env=env))
+    return procs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Safety monitoring multi-camera coordinator")
+    parser.add_argument("--config", default="configs/cluster_config.yaml")
+    parser.add_argument("--local-workers", type=int, default=0,
+                        help="Worker processes to spawn on this machine")
+    parser.add_argument("--worker-capacity", type=int, default=1,
+                        help="Cameras per spawned local worker")
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        cluster_config = yaml.safe_load(f)
+    with open(cluster_config.get('base_config', 'configs/factory_config.yaml'), 'r') as f:
+        base_config = yaml.safe_load(f)
+
+    settings = cluster_config.get('coordinator', {})
+    token = settings.get('token') or os.environ.get('SAFETY_CLUSTER_TOKEN')
+    coordinator = Coordinator(
+        build_camera_configs(cluster_config, base_config),
+        host=settings.get('host', '127.0.0.1'),
+        port=settings.get('port', 7070),
+        token=token,
+        heartbeat_timeout=settings.get('heartbeat_timeout', 10.0),
+        alert_cooldown=settings.get('alert_cooldown', 30.0),
+        retry_backoff=settings.get('retry_backoff', 5.0),
+        result_timeout=settings.get('result_timeout', 30.0),
+    )
+    port = coordinator.start()
+    procs = spawn_local_workers(args.local_workers, port, capacity=args.worker_capacity, token=token)
+
+    try:
+        while True:
+            time.sleep(10)
+            logger.info(f"Cluster status: {coordinator.status()}")
+    except KeyboardInterrupt:
+        logger.info("Stopping...")
+    finally:
+        coordinator.stop()
+        for p in procs:
+            try:
+                p.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                p.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import json
+import socket
+import threading
+
+# Newline-delimited JSON over plain TCP. One message per line, always a dict
+# with a 'type' key:
+#   worker -> coordinator: hello, heartbeat, result, camera_failed
+#   coordinator -> worker: assign, revoke, shutdown
+
+
+class MessageChannel:
+    def __init__(self, sock):
+        """
+        Thread-safe framed JSON channel over a connected socket.
+        """
+        self.sock = sock
+        self.reader = sock.makefile('r', encoding='utf-8', newline='\n')
+        self.send_lock = threading.Lock()
+
+    def send(self, msg):
+        data = (json.dumps(msg, separators=(',', ':')) + '\n').encode('utf-8')
+        with self.send_lock:
+            self.sock.sendall(data)
+
+    def recv(self):
+        """
+        Block for the next message.
+        Returns: dict, or None when the peer has closed the connection.
+        """
+        line = self.reader.readline()
+        if not line:
+            return None
+        return json.loads(line)
+
+    def close(self):
+        # shutdown() first so a thread blocked in recv() wakes up with EOF
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        try:
+            self.reader.close()
+        except OSError:
+            pass
+        try:
+            self.sock.close()
+        except OSError:
+            pass
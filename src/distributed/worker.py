@@ -0,0 +1,167 @@
+import argparse
+import os
+import socket
+import threading
+from loguru import logger
+
+from ..core.video import VideoSource
+from ..core.pipeline import SafetyPipeline, summarize
+from .protocol import MessageChannel
+
+
+class CameraWorker:
+    def __init__(self, host, port, worker_id=None, capacity=4, heartbeat_interval=2.0,
+                 pipeline_factory=None, token=None):
+        """
+        Runs the safety pipeline for the cameras a Coordinator assigns to it
+        and streams compact per-frame summaries back.
+        host, port: Coordinator address.
+        worker_id: str, unique name. Defaults to hostname-pid.
+        capacity: int, max cameras this worker accepts (~ one per spare core).
+        pipeline_factory: callable(config) -> object with process(frame).
+                          Defaults to SafetyPipeline.
+        token: shared secret expected by the Coordinator, if it has one.
+        """
+        self.host = host
+        self.port = port
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.capacity = capacity
+        self.heartbeat_interval = heartbeat_interval
+        self.pipeline_factory = pipeline_factory or SafetyPipeline
+        self.token = token
+
+        self.channel = None
+        self.cameras = {}  # camera_id -> (thread, stop_event)
+        self.stop_event = threading.Event()
+
+    def run(self, reconnect=True):
+        """
+        Serve assignments until shutdown. Reconnects if the Coordinator drops.
+        """
+        while not self.stop_event.is_set():
+            try:
+                self._serve()
+            except OSError as e:
+                logger.warning(f"Worker {self.worker_id}: coordinator connection error: {e}")
+            finally:
+                self._stop_all_cameras()
+            if not reconnect:
+                break
+            self.stop_event.wait(1.0)
+
+    def stop(self):
+        self.stop_event.set()
+        if self.channel is not None:
+            self.channel.close()
+
+    def _serve(self):
+        sock = socket.create_connection((self.host, self.port), timeout=5.0)
+        sock.settimeout(None)
+        self.channel = MessageChannel(sock)
+        self.channel.send({"type": "hello", "worker_id": self.worker_id, "capacity": self.capacity,
+                           "token": self.token})
+        logger.info(f"Worker {self.worker_id} connected to {self.host}:{self.port}")
+
+        heartbeat = threading.Thread(target=self._heartbeat, args=(self.channel,), daemon=True)
+        heartbeat.start()
+
+        try:
+            while not self.stop_event.is_set():
+                msg = self.channel.recv()
+                if msg is None:
+                    logger.warning(f"Worker {self.worker_id}: coordinator closed connection")
+                    break
+
+                if msg['type'] == 'assign':
+                    self._start_camera(msg['camera_id'], msg['config'])
+                elif msg['type'] == 'revoke':
+                    self._stop_camera(msg['camera_id'])
+                elif msg['type'] == 'shutdown':
+                    logger.info(f"Worker {self.worker_id}: shutdown requested")
+                    self.stop_event.set()
+        finally:
+            self.channel.close()
+
+    def _heartbeat(self, channel):
+        while not self.stop_event.wait(self.heartbeat_interval):
+            try:
+                channel.send({"type": "heartbeat", "cameras": list(self.cameras)})
+            except OSError:
+                return
+
+    def _start_camera(self, camera_id, config):
+        if camera_id in self.cameras:
+            return
+        stop = threading.Event()
+        t = threading.Thread(target=self._run_camera, args=(camera_id, config, stop), daemon=True)
+        self.cameras[camera_id] = (t, stop)
+        t.start()
+        logger.info(f"Worker {self.worker_id}: started camera {camera_id}")
+
+    def _stop_camera(self, camera_id):
+        entry = self.cameras.pop(camera_id, None)
+        if entry is None:
+            return
+        t, stop = entry
+        stop.set()
+        t.join(timeout=5.0)
+        logger.info(f"Worker {self.worker_id}: stopped camera {camera_id}")
+
+    def _stop_all_cameras(self):
+        for camera_id in list(self.cameras):
+            self._stop_camera(camera_id)
+
+    def _run_camera(self, camera_id, config, stop):
+        video = None
+        try:
+            camera = config['camera']
+            video = VideoSource(source=camera['source'], loop=camera.get('loop', False))
+            pipeline = self.pipeline_factory(config)
+            while not stop.is_set():
+                frame = video.read()
+                if frame is None:
+                    if video.finished.is_set():
+                        raise EOFError(f"Video source {camera['source']} ended or could not be opened")
+                    continue
+                result = pipeline.process(frame)
+                try:
+                    self.channel.send({"type": "result", "summary": summarize(result, camera_id=camera_id)})
+                except OSError:
+                    # Connection gone; run() tears everything down
+                    return
+        except Exception as e:
+            # Anything else (missing weights, bad config, pipeline errors) is reported
+            # so the coordinator can alert and reassign the camera
+            logger.exception(f"Worker {self.worker_id}: camera {camera_id} failed: {e}")
+            entry = self.cameras.get(camera_id)
+            if entry is not None and entry[0] is threading.current_thread():
+                self.cameras.pop(camera_id, None)
+            try:
+                self.channel.send({"type": "camera_failed", "camera_id": camera_id, "error": str(e)})
+            except OSError:
+                pass
+        finally:
+            if video is not None:
+                video.release()
+
+def main():
+    parser = argparse.ArgumentParser(description="Safety monitoring camera worker")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7070)
+    parser.add_argument("--worker-id", default=None)
+    parser.add_argument("--capacity", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--token", default=os.environ.get('SAFETY_CLUSTER_TOKEN'),
+                        help="Shared coordinator token (default: $SAFETY_CLUSTER_TOKEN)")
+    args = parser.parse_args()
+
+    worker = CameraWorker(args.host, args.port, worker_id=args.worker_id, capacity=args.capacity,
+                          token=args.token)
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        logger.info("Stopping...")
+        worker.stop()
+
+
+if __name__ == "__main__":
+    main()
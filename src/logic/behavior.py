@@ -1,3 +1,4 @@
+import time
 import numpy as np
 from collections import deque
 import supervision as sv
@@ -14,14 +15,16 @@ class BehaviorMonitor:
         self.fps = fps
         self.person_class_id = person_class_id
         self.max_history = fps * 2 # Keep 2 seconds of history
+        self.stale_after = 2.0 # seconds unseen before a track's history is dropped
         
         # Logic thresholds
         self.running_threshold = 5.0 # pixels/frame (Needs calibration to meters/sec ideally)
 
-    def update(self, detections):
+    def update(self, detections, timestamp=None):
         """
         Update history and detect behavior.
         detections: sv.Detections (must have tracker_id)
+        timestamp: float seconds of this frame. Defaults to wall clock.
         Returns: dict {tracker_id: ['Running', ...]}
         """
         alerts = {}
@@ -29,8 +32,8 @@ class BehaviorMonitor:
         # Only track People (class_id 11 by default)
         people = detections[detections.class_id == self.person_class_id]
         
-        import time
-        timestamp = time.time()
+        if timestamp is None:
+            timestamp = time.time()
         
         for box, _, _, class_id, tracker_id, _ in people:
             if tracker_id is None:
@@ -67,4 +70,14 @@ class BehaviorMonitor:
                         alerts[tracker_id] = []
                     alerts[tracker_id].append("Running")
         
+        self._prune(timestamp)
         return alerts
+
+    def _prune(self, timestamp):
+        """
+        Drop history of tracks that left the scene, otherwise it grows
+        with every new tracker_id for the lifetime of the camera.
+        """
+        stale = [tid for tid, h in self.history.items() if timestamp - h[-1][2] > self.stale_after]
+        for tid in stale:
+            del self.history[tid]
@@ -1,6 +1,19 @@
-from ..utils.geometry import box_contains_box
+import cv2
+import numpy as np
+from ..utils.geometry import box_contains_box, calculate_iou
 from loguru import logger
 
+
+def ppe_name(class_id):
+    """
+    Display name for a PPE class ID (dataset IDs: 3=Hardhat, 13=Safety Vest).
+    """
+    if class_id == 3:
+        return "Hardhat"
+    if class_id == 13:
+        return "Safety Vest"
+    return "PPE_Item"
+
 class PPEComplianceEngine:
     def __init__(self, mandatory_ppe=None, person_class_id=11):
         """
@@ -16,10 +29,11 @@ class PPEComplianceEngine:
         else:
             self.mandatory_ppe = mandatory_ppe
 
-    def check_compliance(self, detections):
+    def check_compliance(self, detections, frame=None):
         """
         Check PPE compliance for each detected Person.
         detections: sv.Detections containing ALL objects (Person + PPE).
+        frame: unused, accepted for parity with TwoStageComplianceEngine.
         
         Returns: 
             list of dicts: [{person_id, missing_ppe: [], status: 'SAFE'/'UNSAFE'}]
@@ -62,14 +76,119 @@ class PPEComplianceEngine:
             
             for req_id in required:
                 if req_id not in detected_ppe_classes:
-                    # Map ID to name if possible
-                    name = "PPE_Item"
-                    if req_id == 3: name = "Hardhat"
-                    elif req_id == 13: name = "Safety Vest"
-                    
-                    person_result['missing'].append(name)
+                    person_result['missing'].append(ppe_name(req_id))
                     person_result['status'] = "UNSAFE"
             
             results.append(person_result)
             
         return results
+
+
+class TwoStageComplianceEngine:
+    def __init__(self, classifier, mandatory_ppe=None, person_class_id=11, threshold=0.5,
+                 iou_threshold=0.6, appearance_threshold=0.3, max_age=150, stale_after=30):
+        """
+        PPE compliance from a crop classifier instead of full-frame PPE detections.
+        Person crops are batched into one classifier call per frame, and each
+        tracker_id's result is reused until its box or appearance changes.
+        classifier: object with labels (list of class IDs) and predict(crops) -> (N, L) probs.
+        threshold: probability above which a PPE item counts as worn.
+        iou_threshold: reclassify when IoU with the box at last classification drops below this.
+        appearance_threshold: reclassify when the crop's colour histogram (Bhattacharyya
+                              distance) moves further than this.
+        max_age: frames after which a cached result is refreshed regardless.
+        stale_after: frames a track may be absent before its cache entry is dropped.
+        """
+        self.classifier = classifier
+        self.person_class_id = person_class_id
+        self.mandatory_ppe = mandatory_ppe if mandatory_ppe else [3, 13]
+        missing = [c for c in self.mandatory_ppe if c not in classifier.labels]
+        if missing:
+            raise ValueError(f"Classifier labels {classifier.labels} do not cover mandatory PPE {missing}")
+        self.threshold = threshold
+        self.iou_threshold = iou_threshold
+        self.appearance_threshold = appearance_threshold
+        self.max_age = max_age
+        self.stale_after = stale_after
+
+        # tracker_id -> {box, signature, worn (set of class IDs), classified_at, last_seen}
+        self.cache = {}
+        self.frame_index = 0
+
+    def check_compliance(self, detections, frame=None):
+        """
+        Check PPE compliance for each tracked Person.
+        detections: sv.Detections (people are picked out by class).
+        frame: the image the detections came from (required).
+        Returns: same format as PPEComplianceEngine.check_compliance.
+        """
+        if frame is None:
+            raise ValueError("TwoStageComplianceEngine needs the frame to crop people from")
+        self.frame_index += 1
+        people = detections[detections.class_id == self.person_class_id]
+
+        # Decide which people need the classifier this frame
+        entries = []
+        crops = []
+        for box, _, _, _, tracker_id, _ in people:
+            crop = _crop(frame, box)
+            signature = _signature(crop)
+            entry = self.cache.get(tracker_id) if tracker_id is not None else None
+            if entry is None or self._changed(entry, box, signature):
+                entry = {'box': box, 'signature': signature, 'worn': None, 'classified_at': self.frame_index}
+                crops.append(crop)
+            entry['last_seen'] = self.frame_index
+            if tracker_id is not None:
+                self.cache[tracker_id] = entry
+            entries.append((box, tracker_id, entry))
+
+        # One batched call for new / changed tracks only
+        if crops:
+            probs = self.classifier.predict(crops)
+            pending = [e for _, _, e in entries if e['worn'] is None]
+            for entry, row in zip(pending, probs):
+                entry['worn'] = {c for c, p in zip(self.classifier.labels, row) if p >= self.threshold}
+
+        results = []
+        for box, tracker_id, entry in entries:
+            missing = [ppe_name(c) for c in self.mandatory_ppe if c not in entry['worn']]
+            results.append({
+                "tracker_id": tracker_id if tracker_id is not None else -1,
+                "box": box,
+                "status": "UNSAFE" if missing else "SAFE",
+                "missing": missing
+            })
+
+        self._prune()
+        return results
+
+    def _changed(self, entry, box, signature):
+        if self.frame_index - entry['classified_at'] >= self.max_age:
+            return True
+        if calculate_iou(entry['box'], box) < self.iou_threshold:
+            return True
+        distance = cv2.compareHist(entry['signature'], signature, cv2.HISTCMP_BHATTACHARYYA)
+        return distance > self.appearance_threshold
+
+    def _prune(self):
+        stale = [tid for tid, e in self.cache.items() if self.frame_index - e['last_seen'] > self.stale_after]
+        for tid in stale:
+            del self.cache[tid]
+
+
+def _crop(frame, box):
+    h, w = frame.shape[:2]
+    x1, y1, x2, y2 = [int(round(v)) for v in box]
+    x1, y1 = min(max(x1, 0), w - 1), min(max(y1, 0), h - 1)
+    x2, y2 = min(max(x2, x1 + 1), w), min(max(y2, y1 + 1), h)
+    return frame[y1:y2, x1:x2]
+
+
+def _signature(crop):
+    """
+    Cheap appearance fingerprint: normalised hue/saturation histogram of the crop.
+    """
+    small = cv2.resize(crop, (32, 64), interpolation=cv2.INTER_AREA)
+    hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+    hist = cv2.calcHist([hsv], [0, 1], None, [12, 4], [0, 180, 0, 256])
+    return cv2.normalize(hist, hist).astype(np.float32)
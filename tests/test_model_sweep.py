@@ -0,0 +1,135 @@
+import sys
+import os
+import tempfile
+import yaml
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import train
+from src.core.pipeline import resolve_model, SELECTED_MODEL_FILE
+from train import pareto_front, select_candidate, ppe_class_names, export_weights, candidate_names
+
+
+def candidate(name, latency, accuracy):
+    return {'name': name, 'latency_p50_ms': latency, 'fps': 1000 / latency, 'accuracy': accuracy}
+
+
+def test_pareto_and_selection():
+    results = pareto_front([
+        candidate('n320', 20, 0.50),
+        candidate('n640', 60, 0.70),
+        candidate('s320', 50, 0.55),   # dominated by nothing: slower than n320 but more accurate
+        candidate('s480', 90, 0.65),   # dominated by n640
+        candidate('s640', 150, 0.80),
+    ])
+    assert [r['name'] for r in results if r['pareto']] == ['n320', 'n640', 's320', 's640']
+
+    # 15 FPS budget: n640 (16.7 FPS) is the most accurate that fits
+    assert select_candidate(results, target_fps=15)['name'] == 'n640'
+    # Nothing reaches 100 FPS: fall back to the fastest
+    assert select_candidate(results, target_fps=100)['name'] == 'n320'
+    assert select_candidate([], target_fps=10) is None
+
+
+def test_ppe_class_names():
+    with tempfile.TemporaryDirectory() as tmp:
+        factory = os.path.join(tmp, 'factory.yaml')
+        with open(factory, 'w') as f:
+            yaml.safe_dump({'camera': {'person_class_id': 2}, 'ppe': {'mandatory_classes': [0, 1]}}, f)
+        classes = ppe_class_names({'names': ['Hardhat', 'Safety Vest', 'Person', 'Ladder']}, factory)
+        assert classes == {0: 'Hardhat', 1: 'Safety Vest', 2: 'Person'}
+
+
+def test_resolve_model_prefers_config_then_sweep():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            assert resolve_model({}) == ('yolov8n.pt', 640)
+
+            os.makedirs(os.path.dirname(SELECTED_MODEL_FILE))
+            with open(SELECTED_MODEL_FILE, 'w') as f:
+                yaml.safe_dump({'path': 'runs/sweep/yolov8n/weights/best.onnx', 'imgsz': 320}, f)
+            assert resolve_model({}) == ('runs/sweep/yolov8n/weights/best.onnx', 320)
+
+            assert resolve_model({'model': {'path': 'custom.pt'}}) == ('custom.pt', 640)
+        finally:
+            os.chdir(cwd)
+
+
+class FakeYOLO:
+    """Mimics Ultralytics: every export lands at the same path next to the weights."""
+    def __init__(self, weights):
+        self.weights = weights
+
+    def export(self, format, imgsz, device):
+        stem = os.path.splitext(self.weights)[0]
+        if format == 'openvino':
+            path = stem + '_openvino_model'
+            os.makedirs(path, exist_ok=True)
+            with open(os.path.join(path, 'best.xml'), 'w') as f:
+                f.write(str(imgsz))
+            return path
+        path = stem + '.' + format
+        with open(path, 'w') as f:
+            f.write(str(imgsz))
+        return path
+
+
+def test_export_paths_are_per_imgsz():
+    cwd = os.getcwd()
+    real_yolo = train.YOLO
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        train.YOLO = FakeYOLO
+        try:
+            os.makedirs('weights')
+            weights = os.path.join('weights', 'best.pt')
+            for fmt, filename in (('onnx', None), ('openvino', 'best.xml')):
+                paths = [export_weights(weights, fmt, imgsz, 'yolov8n') for imgsz in (320, 640)]
+                assert paths[0] != paths[1]
+                # Each path still holds the export made at its own size
+                for path, imgsz in zip(paths, (320, 640)):
+                    with open(os.path.join(path, filename) if filename else path) as f:
+                        assert f.read() == str(imgsz)
+            assert export_weights(weights, 'pytorch', 320, 'yolov8n') == weights
+        finally:
+            train.YOLO = real_yolo
+            os.chdir(cwd)
+
+
+def test_same_named_weights_get_distinct_names():
+    names = candidate_names([
+        'runs/train/ppe_model/weights/best.pt',
+        'runs/train/ppe_model_v2/weights/best.pt',
+        'best.pt',
+        'yolov8n.pt',
+        'yolov8n.pt',
+    ])
+    assert names == ['ppe_model_best', 'ppe_model_v2_best', 'best', 'yolov8n', 'yolov8n_2']
+
+    cwd = os.getcwd()
+    real_yolo = train.YOLO
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        train.YOLO = FakeYOLO
+        try:
+            sources = [os.path.join(run, 'weights', 'best.pt') for run in ('a', 'b')]
+            for weights in sources:
+                os.makedirs(os.path.dirname(weights))
+            paths = [export_weights(w, 'onnx', 320, name) for w, name in zip(sources, candidate_names(sources))]
+            assert paths[0] != paths[1]
+            assert all(os.path.exists(p) for p in paths)
+        finally:
+            train.YOLO = real_yolo
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    test_pareto_and_selection()
+    test_ppe_class_names()
+    test_resolve_model_prefers_config_then_sweep()
+    test_export_paths_are_per_imgsz()
+    test_same_named_weights_get_distinct_names()
+    print("ALL TESTS PASSED")
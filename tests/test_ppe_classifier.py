@@ -0,0 +1,91 @@
+import sys
+import os
+import tempfile
+import numpy as np
+import onnx
+from onnx import helper, numpy_helper, TensorProto
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import supervision as sv
+from src.core.classifier import PPEClassifier
+from src.core.pipeline import SafetyPipeline
+from src.logic.compliance import TwoStageComplianceEngine
+
+
+def write_tiny_model(path):
+    """
+    (N, 3, H, W) RGB -> channel means -> logits:
+      label 0 = 10 * mean(R) - 5, label 1 = 10 * mean(B) - 5
+    """
+    weights = np.array([[10, 0], [0, 0], [0, 10]], dtype=np.float32)
+    bias = np.array([-5, -5], dtype=np.float32)
+    graph = helper.make_graph(
+        [
+            helper.make_node('GlobalAveragePool', ['input'], ['pooled']),
+            helper.make_node('Flatten', ['pooled'], ['flat'], axis=1),
+            helper.make_node('Gemm', ['flat', 'W', 'B'], ['logits']),
+        ],
+        'tiny_ppe',
+        [helper.make_tensor_value_info('input', TensorProto.FLOAT, ['N', 3, 32, 32])],
+        [helper.make_tensor_value_info('logits', TensorProto.FLOAT, ['N', 2])],
+        initializer=[numpy_helper.from_array(weights, 'W'), numpy_helper.from_array(bias, 'B')],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)])
+    model.ir_version = 8
+    onnx.save(model, path)
+
+
+def test_predict_batches_mixed_size_crops():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'tiny.onnx')
+        write_tiny_model(path)
+        classifier = PPEClassifier(path, labels=[3, 13], imgsz=32)
+
+        red = np.zeros((200, 80, 3), dtype=np.uint8)
+        red[..., 2] = 255                         # BGR red -> label 0 (Hardhat)
+        blue = np.zeros((50, 120, 3), dtype=np.uint8)
+        blue[..., 0] = 255                        # BGR blue -> label 1 (Vest)
+        grey = np.full((90, 90, 3), 128, dtype=np.uint8)
+
+        probs = classifier.predict([red, blue, grey])
+        assert probs.shape == (3, 2)
+        assert probs[0, 0] > 0.99 and probs[0, 1] < 0.01
+        assert probs[1, 0] < 0.01 and probs[1, 1] > 0.99
+        assert np.allclose(probs[2], 1 / (1 + np.exp(-(10 * 128 / 255 - 5))), atol=1e-3)
+
+        assert classifier.predict([]).shape == (0, 2)
+
+
+class PersonDetector:
+    def detect(self, frame):
+        return sv.Detections(
+            xyxy=np.array([[10, 10, 60, 110]], dtype=float),
+            class_id=np.array([11]),
+            confidence=np.array([0.9])
+        )
+
+
+def test_pipeline_two_stage_mode_from_config():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'tiny.onnx')
+        write_tiny_model(path)
+        config = {
+            'camera': {'fps': 30, 'person_class_id': 11},
+            'ppe': {'mandatory_classes': [3, 13], 'classifier': {'model': path, 'labels': [3, 13], 'imgsz': 32}},
+        }
+        pipeline = SafetyPipeline(config, detector=PersonDetector())
+        assert isinstance(pipeline.ppe_engine, TwoStageComplianceEngine)
+
+        frame = np.zeros((240, 320, 3), dtype=np.uint8)
+        frame[10:110, 10:60] = (0, 0, 255)  # red person: hardhat but no vest
+        result = pipeline.process(frame)
+        assert result['ppe_results'][0]['status'] == 'UNSAFE'
+        assert result['ppe_results'][0]['missing'] == ['Safety Vest']
+
+
+if __name__ == "__main__":
+    test_predict_batches_mixed_size_crops()
+    test_pipeline_two_stage_mode_from_config()
+    print("ALL TESTS PASSED")
@@ -0,0 +1,80 @@
+import sys
+import os
+import itertools
+import numpy as np
+import supervision as sv
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.pipeline import SafetyPipeline
+from src.logic.behavior import BehaviorMonitor
+from soak import SyntheticScene, SyntheticDetector, run_soak, check_drift
+
+
+def test_behavior_history_drops_departed_tracks():
+    bm = BehaviorMonitor(fps=10)
+    for tid in range(100):
+        det = sv.Detections(
+            xyxy=np.array([[0, 0, 50, 100]], dtype=float),
+            class_id=np.array([11]),
+            tracker_id=np.array([tid])
+        )
+        bm.update(det, timestamp=tid * 1.0)
+    # Each track was seen once, one second apart; only the last few survive
+    assert len(bm.history) <= 3
+    assert 99 in bm.history
+
+
+def test_soak_history_bounded_under_turnover():
+    fps = 5
+    scene = SyntheticScene(mean_people=6, mean_lifetime_s=3.0, fps=fps, seed=1)
+    config = {'camera': {'fps': fps, 'person_class_id': 11}, 'ppe': {'mandatory_classes': [3, 13]}}
+    pipeline = SafetyPipeline(config, detector=SyntheticDetector(scene))
+
+    samples = run_soak(pipeline, itertools.repeat(np.zeros((1, 1, 3), dtype=np.uint8)),
+                       fps=fps, duration_s=90, sample_every_s=15, trace_memory=False)
+
+    assert len(samples) == 6
+    assert set(samples[0]['p99_ms']) == {'detect', 'track', 'zones', 'behavior', 'ppe', 'total'}
+    # Dozens of people passed through, but only those on screen are remembered
+    assert all(s['history_tracks'] <= 20 for s in samples)
+
+
+def test_check_drift():
+    def sample(traced, detect, behavior=0.05):
+        p99 = {'detect': detect, 'behavior': behavior}
+        p99['total'] = detect + behavior
+        return {'traced_mb': traced, 'rss_mb': None, 'p99_ms': p99}
+
+    steady = [sample(10.0, 5.0)] + [sample(12.0, 5.0 + i * 0.1) for i in range(6)]
+    assert check_drift(steady) == []
+
+    leaking = [sample(10.0, 5.0)] + [sample(12.0 + i * 10, 5.0) for i in range(6)]
+    failures = check_drift(leaking)
+    assert len(failures) == 1 and failures[0].startswith('traced_mb')
+
+    slowing = [sample(10.0, 5.0)] + [sample(12.0, 5.0 * (i + 1)) for i in range(6)]
+    failures = check_drift(slowing)
+    assert any(f.startswith('detect p99') for f in failures)
+
+    # A cheap stage blowing up 100x barely moves the total but must still fail
+    behavior_slowing = [sample(10.0, 20.0, behavior=0.05)] * 2 + [sample(10.0, 20.0, behavior=5.0)] * 3
+    failures = check_drift(behavior_slowing)
+    assert len(failures) == 1 and failures[0].startswith('behavior p99')
+
+    # Sub-millisecond jitter stays under the floor
+    jitter = [sample(10.0, 5.0, behavior=0.01)] * 2 + [sample(10.0, 5.0, behavior=0.05)] * 3
+    assert check_drift(jitter) == []
+
+    # Warmup plus base alone leaves nothing to compare against
+    assert len(check_drift(steady[:1])) == 1
+    assert len(check_drift(slowing[:2])) == 1
+    assert check_drift(steady[:3]) == []
+
+
+if __name__ == "__main__":
+    test_behavior_history_drops_departed_tracks()
+    test_soak_history_bounded_under_turnover()
+    test_check_drift()
+    print("ALL TESTS PASSED")
@@ -0,0 +1,79 @@
+import sys
+import os
+import numpy as np
+import supervision as sv
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.logic.compliance import TwoStageComplianceEngine
+
+
+class FakeClassifier:
+    """Hardhat (3) if the crop is mostly blue, vest (13) always. Counts crops classified."""
+    labels = [3, 13]
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, crops):
+        self.calls.append(len(crops))
+        return np.array([[float(c[..., 0].mean() > 128), 1.0] for c in crops])
+
+
+def people(boxes, tracker_ids):
+    return sv.Detections(
+        xyxy=np.array(boxes, dtype=float),
+        class_id=np.full(len(boxes), 11),
+        tracker_id=np.array(tracker_ids),
+        confidence=np.full(len(boxes), 0.9)
+    )
+
+
+def test_two_stage_caches_per_track():
+    classifier = FakeClassifier()
+    engine = TwoStageComplianceEngine(classifier, mandatory_ppe=[3, 13], person_class_id=11)
+
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    frame[100:300, 100:200] = (255, 0, 0)  # person 1: blue, wearing hardhat
+    frame[100:300, 300:400] = (0, 0, 255)  # person 2: red, no hardhat
+    dets = people([[100, 100, 200, 300], [300, 100, 400, 300]], [1, 2])
+
+    # Frame 1: both tracks are new -> one batched call with two crops
+    results = engine.check_compliance(dets, frame=frame)
+    assert classifier.calls == [2]
+    assert [r['status'] for r in results] == ['SAFE', 'UNSAFE']
+    assert results[1]['missing'] == ['Hardhat']
+
+    # Frame 2: nothing moved -> served from cache, no classifier call
+    results = engine.check_compliance(dets, frame=frame)
+    assert classifier.calls == [2]
+    assert [r['status'] for r in results] == ['SAFE', 'UNSAFE']
+
+    # Frame 3: person 2 walks away -> only that track is reclassified
+    frame[100:300, 300:400] = 0
+    frame[200:400, 450:550] = (0, 0, 255)
+    dets = people([[100, 100, 200, 300], [450, 200, 550, 400]], [1, 2])
+    engine.check_compliance(dets, frame=frame)
+    assert classifier.calls == [2, 1]
+
+    # Frame 4: person 1 takes off the hardhat in place -> appearance change triggers reclassify
+    frame[100:300, 100:200] = (0, 255, 0)
+    results = engine.check_compliance(dets, frame=frame)
+    assert classifier.calls == [2, 1, 1]
+    assert results[0]['status'] == 'UNSAFE'
+
+
+def test_two_stage_drops_departed_tracks():
+    engine = TwoStageComplianceEngine(FakeClassifier(), person_class_id=11, stale_after=5)
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+
+    for tid in range(50):
+        engine.check_compliance(people([[10, 10, 60, 110]], [tid]), frame=frame)
+    assert len(engine.cache) <= 6
+
+
+if __name__ == "__main__":
+    test_two_stage_caches_per_track()
+    test_two_stage_drops_departed_tracks()
+    print("ALL TESTS PASSED")
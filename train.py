@@ -1,7 +1,18 @@
 from ultralytics import YOLO
+import argparse
+import glob
+import json
 import os
+import shutil
+import time
+import cv2
+import numpy as np
 import yaml
 
+from src.core.pipeline import SELECTED_MODEL_FILE
+
+SWEEP_DIR = 'runs/sweep'
+
 def train_model():
     # 1. Setup paths
     dataset_yaml = os.path.abspath("data/lite/data.yaml")
@@ -46,5 +57,284 @@ def train_model():
     except Exception as e:
         print(f"Training failed: {e}")
 
+def ppe_class_names(data_config, factory_config_path="configs/factory_config.yaml"):
+    """
+    Classes scored in the sweep: the mandatory PPE plus Person, as enforced by main.py.
+    Returns: dict {class_id: name}
+    """
+    with open(factory_config_path, 'r') as f:
+        factory = yaml.safe_load(f)
+    ids = list(factory.get('ppe', {}).get('mandatory_classes') or [3, 13])
+    ids.append(factory.get('camera', {}).get('person_class_id', 11))
+
+    names = data_config['names']
+    if isinstance(names, list):
+        names = dict(enumerate(names))
+    return {i: names.get(i, str(i)) for i in ids}
+
+
+def candidate_names(sources):
+    """
+    Unique, readable names for the sweep candidates, used in the report and
+    as export directories. Bare model names keep their stem (yolov8n);
+    weights in a directory are prefixed with it, skipping Ultralytics'
+    weights/ level (runs/train/ppe_model/weights/best.pt -> ppe_model_best).
+    Remaining clashes get a numeric suffix.
+    Returns: list of names, one per source
+    """
+    names = []
+    for source in sources:
+        stem = os.path.splitext(os.path.basename(source))[0]
+        directory = os.path.dirname(os.path.normpath(source))
+        if directory:
+            directory = os.path.abspath(directory)
+            if os.path.basename(directory) == 'weights':
+                directory = os.path.dirname(directory)
+            stem = f"{os.path.basename(directory)}_{stem}"
+        name, n = stem, 2
+        while name in names:
+            name, n = f"{stem}_{n}", n + 1
+        names.append(name)
+    return names
+
+
+def train_candidate(base_model, dataset_yaml, epochs, imgsz, retrain=False):
+    """
+    Fine-tune `base_model` on the dataset, reusing earlier sweep weights unless retrain.
+    Returns: path to best.pt
+    """
+    name = os.path.splitext(os.path.basename(base_model))[0]
+    best = os.path.join(SWEEP_DIR, name, 'weights', 'best.pt')
+    if os.path.exists(best) and not retrain:
+        print(f"Reusing {best}")
+        return best
+
+    model = YOLO(base_model)
+    model.train(
+        data=dataset_yaml,
+        epochs=epochs,
+        imgsz=imgsz,
+        batch=16,
+        project=SWEEP_DIR,
+        name=name,
+        exist_ok=True,
+        device='cpu'
+    )
+    return str(model.trainer.best)
+
+
+def evaluate_accuracy(weights, dataset_yaml, imgsz, classes):
+    """
+    Validate at the given input size.
+    Returns: dict {class_name: {'map50': float, 'map50_95': float}}, None for classes absent from val.
+    """
+    metrics = YOLO(weights).val(data=dataset_yaml, imgsz=imgsz, device='cpu', plots=False, verbose=False)
+    per_class = {name: None for name in classes.values()}
+    for i, class_id in enumerate(metrics.box.ap_class_index):
+        if class_id in classes:
+            per_class[classes[class_id]] = {
+                'map50': float(metrics.box.ap50[i]),
+                'map50_95': float(metrics.box.ap[i]),
+            }
+    return per_class
+
+
+def export_weights(weights, fmt, imgsz, name):
+    """
+    Export .pt weights for CPU inference. 'pytorch' means use the .pt as is.
+    Exports have a static input shape but Ultralytics writes every size to the
+    same path (best.onnx, best_openvino_model/), so each one is moved to
+    runs/sweep/<name>/<imgsz>/.
+    Returns: path loadable by YOLO()
+    """
+    if fmt == 'pytorch':
+        return weights
+    exported = str(YOLO(weights).export(format=fmt, imgsz=imgsz, device='cpu'))
+
+    target = os.path.join(SWEEP_DIR, name, str(imgsz), os.path.basename(exported.rstrip(os.sep)))
+    if os.path.isdir(target):
+        shutil.rmtree(target)
+    elif os.path.exists(target):
+        os.remove(target)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    shutil.move(exported, target)
+    return target
+
+
+def benchmark_latency(model_path, imgsz, images, warmup=5, runs=50):
+    """
+    Single-stream CPU inference latency, pre/post-processing included,
+    the same call SafeDetector makes per frame.
+    images: list of decoded BGR frames (np.ndarray), so disk reads and
+            JPEG decoding stay out of the timings.
+    Returns: dict with latency_p50_ms, latency_p95_ms, fps
+    """
+    model = YOLO(model_path, task='detect')
+    for i in range(warmup):
+        model(images[i % len(images)], imgsz=imgsz, device='cpu', verbose=False)
+
+    times = []
+    for i in range(runs):
+        start = time.perf_counter()
+        model(images[i % len(images)], imgsz=imgsz, device='cpu', verbose=False)
+        times.append(time.perf_counter() - start)
+
+    times = np.array(times) * 1000
+    return {
+        'latency_p50_ms': float(np.percentile(times, 50)),
+        'latency_p95_ms': float(np.percentile(times, 95)),
+        'fps': float(1000 / times.mean()),
+    }
+
+
+def pareto_front(results):
+    """
+    Mark candidates not beaten on both latency and accuracy by another one.
+    results: list of dicts with 'latency_p50_ms' and 'accuracy'. Sets 'pareto' in place.
+    """
+    for r in results:
+        r['pareto'] = not any(
+            o['latency_p50_ms'] <= r['latency_p50_ms'] and o['accuracy'] >= r['accuracy']
+            and (o['latency_p50_ms'] < r['latency_p50_ms'] or o['accuracy'] > r['accuracy'])
+            for o in results
+        )
+    return results
+
+
+def select_candidate(results, target_fps):
+    """
+    Most accurate candidate meeting target_fps; the fastest one if none does.
+    """
+    if not results:
+        return None
+    fast_enough = [r for r in results if r['fps'] >= target_fps]
+    if fast_enough:
+        return max(fast_enough, key=lambda r: (r['accuracy'], r['fps']))
+    print(f"Warning: no candidate reaches {target_fps} FPS, picking the fastest")
+    return max(results, key=lambda r: r['fps'])
+
+
+def write_report(results, selected, target_fps, path):
+    lines = [
+        f"# Model sweep (target {target_fps} FPS, CPU)",
+        "",
+        "Accuracy is measured once per weights and input size; exported formats reuse it.",
+        "",
+        "| candidate | imgsz | format | p50 ms | p95 ms | FPS | PPE mAP50 | per-class mAP50 | pareto |",
+        "|---|---|---|---|---|---|---|---|---|",
+    ]
+    for r in sorted(results, key=lambda r: r['latency_p50_ms']):
+        per_class = ", ".join(
+            f"{name}: {v['map50']:.3f}" if v else f"{name}: n/a" for name, v in r['per_class'].items()
+        )
+        mark = " **(selected)**" if r is selected else ""
+        lines.append(
+            f"| {r['name']}{mark} | {r['imgsz']} | {r['format']} | {r['latency_p50_ms']:.1f} | "
+            f"{r['latency_p95_ms']:.1f} | {r['fps']:.1f} | {r['accuracy']:.3f} | {per_class} | "
+            f"{'yes' if r['pareto'] else ''} |"
+        )
+    with open(path, 'w') as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def sweep_models(args):
+    dataset_yaml = os.path.abspath(args.data)
+    if not os.path.exists(dataset_yaml):
+        print(f"Error: {dataset_yaml} not found!")
+        return
+
+    with open(dataset_yaml, 'r') as f:
+        data_config = yaml.safe_load(f)
+    classes = ppe_class_names(data_config)
+    print(f"Scoring classes: {classes}")
+
+    # Benchmark on real validation frames where available
+    val_dir = os.path.join(os.path.dirname(dataset_yaml), data_config.get('val', 'valid/images'))
+    paths = sorted(glob.glob(os.path.join(val_dir, '*.jpg')) + glob.glob(os.path.join(val_dir, '*.png')))[:20]
+    images = [img for img in (cv2.imread(p) for p in paths) if img is not None]
+    if not images:
+        images = [np.random.randint(0, 255, (720, 1280, 3), dtype=np.uint8)]
+
+    candidates = [(w, None) for w in args.weights]
+    for base_model in args.models:
+        candidates.append((base_model, train_candidate(base_model, dataset_yaml, args.epochs,
+                                                       args.train_imgsz, retrain=args.retrain)))
+
+    results = []
+    names = candidate_names([source for source, _ in candidates])
+    for (source, weights), name in zip(candidates, names):
+        weights = weights or source
+        for imgsz in args.imgsz:
+            print(f"Evaluating {name} @ {imgsz}")
+            per_class = evaluate_accuracy(weights, dataset_yaml, imgsz, classes)
+            scored = [v['map50'] for v in per_class.values() if v]
+            accuracy = float(np.mean(scored)) if scored else 0.0
+
+            for fmt in args.formats:
+                try:
+                    model_path = export_weights(weights, fmt, imgsz, name)
+                    speed = benchmark_latency(model_path, imgsz, images, runs=args.runs)
+                except Exception as e:
+                    print(f"Skipping {name} @ {imgsz} ({fmt}): {e}")
+                    continue
+                results.append({
+                    'name': name,
+                    'weights': weights,
+                    'model_path': str(model_path),
+                    'imgsz': imgsz,
+                    'format': fmt,
+                    'accuracy': accuracy,
+                    'per_class': per_class,
+                    **speed,
+                })
+                print(f"  {fmt}: {speed['fps']:.1f} FPS, PPE mAP50 {accuracy:.3f}")
+
+    pareto_front(results)
+    selected = select_candidate(results, args.target_fps)
+
+    os.makedirs(SWEEP_DIR, exist_ok=True)
+    with open(os.path.join(SWEEP_DIR, 'report.json'), 'w') as f:
+        json.dump({'target_fps': args.target_fps, 'results': results}, f, indent=2)
+    write_report(results, selected, args.target_fps, os.path.join(SWEEP_DIR, 'report.md'))
+    print(f"Report written to {SWEEP_DIR}/report.md")
+
+    if selected is None:
+        print("No candidate could be benchmarked")
+        return
+    with open(SELECTED_MODEL_FILE, 'w') as f:
+        yaml.safe_dump({
+            'path': selected['model_path'],
+            'imgsz': selected['imgsz'],
+            'format': selected['format'],
+            'fps': round(selected['fps'], 1),
+            'accuracy': round(selected['accuracy'], 4),
+        }, f)
+    print(f"Selected {selected['model_path']} @ {selected['imgsz']} for main.py ({SELECTED_MODEL_FILE})")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the PPE model, or sweep deployment candidates")
+    parser.add_argument("--sweep", action="store_true",
+                        help="Compare model size / input size / export format on CPU and pick one for main.py")
+    parser.add_argument("--data", default="data/lite/data.yaml")
+    parser.add_argument("--models", nargs="*", default=["yolov8n.pt", "yolov8s.pt"],
+                        help="Base models to fine-tune (reuses earlier sweep weights)")
+    parser.add_argument("--weights", nargs="*", default=[],
+                        help="Already trained .pt weights to include without training")
+    parser.add_argument("--imgsz", nargs="+", type=int, default=[320, 480, 640],
+                        help="Inference input sizes to evaluate")
+    parser.add_argument("--train-imgsz", type=int, default=640)
+    parser.add_argument("--formats", nargs="+", default=["pytorch", "onnx", "openvino"])
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--retrain", action="store_true")
+    parser.add_argument("--runs", type=int, default=50, help="Timed inferences per candidate")
+    parser.add_argument("--target-fps", type=float, default=10.0)
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    train_model()
+    args = parse_args()
+    if args.sweep:
+        sweep_models(args)
+    else:
+        train_model()